@@ -33,7 +33,7 @@ class CharacterManager:
         self.available_voices = self._load_available_voices()
         
         # Aguarda a inicialização completa do banco de dados
-        if not hasattr(self.db, 'initialized') or not self.db.initialized:
+        if not self.db.initialized:
             await self.db.initialize()
         
         self.initialized = True
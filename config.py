@@ -13,7 +13,7 @@ incluindo:
 import os
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 from dataclasses import dataclass
 
 @dataclass
@@ -22,6 +22,7 @@ class DatabaseConfig:
     main_db: str = "tale_weaver.db"
     cache_enabled: bool = True
     cache_ttl: int = 300  # 5 minutos
+    cache_size: int = 1024  # Máximo de consultas mantidas em cache
 
 @dataclass
 class LLMConfig:
@@ -130,7 +131,8 @@ class ConfigManager:
                     "database": True,
                     "story": True,
                     "character": True,
-                    "config": True
+                    "config": True,
+                    "llm": True
                 },
                 "default_level": "INFO"
             }
@@ -138,6 +140,8 @@ class ConfigManager:
         
         self.load_config()
         self.character_manager = None
+        self.voice_system = None
+        self._module_logging_callbacks: List[Callable[[], None]] = []
         
     async def initialize_character_manager(self, db_manager):
         """Inicializa o CharacterManager com o DatabaseManager"""
@@ -155,6 +159,12 @@ class ConfigManager:
     def set_module_logging(self, module_name: str, enabled: bool) -> None:
         """Ativa/desativa logging para um módulo específico"""
         self.set(f"logging.enabled_modules.{module_name}", enabled)
+        for callback in self._module_logging_callbacks:
+            callback()
+
+    def on_module_logging_change(self, callback: Callable[[], None]) -> None:
+        """Registra uma função chamada sempre que o logging de um módulo mudar"""
+        self._module_logging_callbacks.append(callback)
 
     def load_config(self) -> None:
         """Carrega configurações do arquivo ou usa padrões"""
@@ -225,10 +235,8 @@ class ConfigManager:
         """Inicializa o sistema de voz"""
         from voice_system import VoiceSystem
         
-        # Verifica se o diretório de vozes existe
+        # O VoiceSystem cria o diretório de vozes se ele não existir
         voice_dir = Path(self.get("audio.voice_dir", "voices"))
-        if not voice_dir.exists():
-            voice_dir.mkdir(parents=True)
         
         # Inicializa o sistema de voz
         self.voice_system = VoiceSystem(
@@ -0,0 +1,134 @@
+"""
+Módulo de Entrada do Console
+
+Este módulo permite ler o teclado a partir de corrotinas sem bloquear o
+loop de eventos do TaleWeaver.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from typing import Callable, Optional
+
+# Bytes já lidos do stdin redirecionado que ainda não completaram uma linha
+_pending = bytearray()
+
+async def ainput(prompt: str = "") -> str:
+    """Lê uma linha do console sem bloquear o loop de eventos
+
+    Num terminal, a leitura roda numa thread daemon, para que um Ctrl+C ou o
+    encerramento do programa não fiquem esperando o usuário apertar Enter.
+
+    Com o stdin redirecionado (pipe, arquivo, console de IDE), uma thread
+    presa no input() seguraria o lock do sys.stdin e o interpretador abortaria
+    ao encerrar. Nesse caso o descritor é lido diretamente: no POSIX pelo
+    próprio loop, que só lê quando há dados; nos demais sistemas por uma
+    thread que não passa pelo buffer do sys.stdin.
+
+    Args:
+        prompt: Texto exibido antes da leitura
+
+    Returns:
+        Linha digitada, sem a quebra de linha final
+
+    Raises:
+        EOFError: Se o stdin terminar antes de qualquer caractere
+    """
+    loop = asyncio.get_running_loop()
+    fd = _redirected_stdin_fd()
+    if fd is None:
+        return await _run_in_thread(loop, lambda: input(prompt))
+
+    if prompt:
+        sys.stdout.write(prompt)
+        sys.stdout.flush()
+    line = _take_line()
+    if line is not None:
+        return line
+    if os.name == "posix":
+        return await _wait_for_line(loop, fd)
+    return await _run_in_thread(loop, lambda: _read_line(fd))
+
+def _redirected_stdin_fd() -> Optional[int]:
+    """Retorna o descritor do stdin se ele não for um terminal, senão None"""
+    try:
+        if sys.stdin.isatty():
+            return None
+        return sys.stdin.fileno()
+    except (AttributeError, OSError, ValueError):
+        # stdin ausente ou trocado por um objeto sem descritor
+        return None
+
+def _take_line(eof: bool = False) -> Optional[str]:
+    """Retira do buffer a próxima linha completa, ou a sobra final no EOF"""
+    end = _pending.find(b"\n")
+    if end < 0:
+        if not eof:
+            return None
+        if not _pending:
+            raise EOFError
+        end = len(_pending)
+    line = bytes(_pending[:end])
+    del _pending[:end + 1]
+    encoding = getattr(sys.stdin, "encoding", None) or "utf-8"
+    return line.decode(encoding, "replace").rstrip("\r")
+
+def _read_line(fd: int) -> str:
+    """Lê uma linha do descritor, bloqueando até ela chegar"""
+    line = _take_line()
+    while line is None:
+        chunk = os.read(fd, 4096)
+        _pending.extend(chunk)
+        line = _take_line(eof=not chunk)
+    return line
+
+async def _wait_for_line(loop: asyncio.AbstractEventLoop, fd: int) -> str:
+    """Aguarda uma linha do descritor, lendo só quando o loop indicar dados"""
+    future = loop.create_future()
+
+    def _on_readable():
+        if future.done():
+            return
+        try:
+            chunk = os.read(fd, 4096)
+            _pending.extend(chunk)
+            line = _take_line(eof=not chunk)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        if line is not None:
+            future.set_result(line)
+
+    try:
+        loop.add_reader(fd, _on_readable)
+    except (NotImplementedError, OSError):
+        # Arquivos comuns não são aceitos pelo seletor; a leitura não bloqueia
+        return await _run_in_thread(loop, lambda: _read_line(fd))
+    try:
+        return await future
+    finally:
+        loop.remove_reader(fd)
+
+async def _run_in_thread(loop: asyncio.AbstractEventLoop, read: Callable[[], str]) -> str:
+    """Executa a leitura numa thread daemon e aguarda o resultado"""
+    future = loop.create_future()
+
+    def _resolve(result=None, error=None):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _read():
+        try:
+            result = read()
+        except BaseException as e:
+            loop.call_soon_threadsafe(_resolve, None, e)
+        else:
+            loop.call_soon_threadsafe(_resolve, result)
+
+    threading.Thread(target=_read, daemon=True).start()
+    return await future
@@ -14,23 +14,27 @@ import os
 import sqlite3
 import aiosqlite
 import json
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import asdict
 from config import ConfigManager
 from datetime import datetime
 import hashlib
-import asyncio
+import time
 from functools import wraps
 
 class AsyncDatabaseManager:
     def __init__(self, config: ConfigManager):
         self.config = config
         self.connection: Optional[aiosqlite.Connection] = None
-        self.cache: Dict[str, Any] = {}
+        # LRU limitado: (expiração, resultado) por consulta
+        self.cache: OrderedDict[bytes, Tuple[float, Any]] = OrderedDict()
         self.cache_enabled = self.config.get('database.cache_enabled', True)
         self.cache_ttl = self.config.get('database.cache_ttl', 300)
+        self.cache_size = self.config.get('database.cache_size', 1024)
         self.initialized = False
+        self._character_table_verified = False
         
     async def initialize(self) -> None:
         """Inicializa o banco de dados"""
@@ -45,6 +49,7 @@ class AsyncDatabaseManager:
             # Depois verifica e atualiza a tabela characters
             await self._verify_character_table()
             
+            self.initialized = True
             print(f"Banco de dados inicializado em: {db_path}")
         except Exception as e:
             print(f"Erro ao inicializar banco de dados: {e}")
@@ -171,7 +176,7 @@ class AsyncDatabaseManager:
         """Verifica e atualiza a tabela characters se necessário"""
         try:
             # Verifica se já foi inicializado
-            if hasattr(self, '_character_table_verified') and self._character_table_verified:
+            if self._character_table_verified:
                 return
                 
             # Verifica se a tabela characters existe
@@ -231,8 +236,14 @@ class AsyncDatabaseManager:
         """Executa uma consulta no banco de dados"""
         cache_key = self._generate_cache_key(query, params)
         
-        if use_cache and self.cache_enabled and cache_key in self.cache:
-            return self.cache[cache_key]
+        if use_cache and self.cache_enabled:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                expires_at, result = cached
+                if time.monotonic() < expires_at:
+                    self.cache.move_to_end(cache_key)
+                    return result
+                del self.cache[cache_key]
             
         try:
             cursor = await self.connection.execute(query, params)
@@ -240,40 +251,53 @@ class AsyncDatabaseManager:
             result = [dict(row) for row in rows]
             
             if use_cache and self.cache_enabled:
-                self.cache[cache_key] = result
-                asyncio.create_task(self._clear_cache_after_ttl(cache_key))
+                self.cache[cache_key] = (time.monotonic() + self.cache_ttl, result)
+                self.cache.move_to_end(cache_key)
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
                 
             return result
         except Exception as e:
             print(f"Erro ao executar query: {e}")
             raise
 
-    async def execute_write(self, query: str, params: Tuple = ()) -> int:
-        """Executa uma operação de escrita no banco de dados"""
+    async def execute_write(self, query: str, params: Tuple = (), commit: bool = True) -> int:
+        """Executa uma operação de escrita no banco de dados
+        
+        Args:
+            query: Comando SQL de escrita
+            params: Parâmetros do comando
+            commit: Se False, a escrita fica pendente até o próximo commit(),
+                permitindo agrupar várias escritas numa única transação
+        """
         try:
             cursor = await self.connection.execute(query, params)
-            await self.connection.commit()
+            if commit:
+                await self.connection.commit()
             return cursor.lastrowid
         except Exception as e:
             print(f"Erro ao executar escrita: {e}")
             await self.connection.rollback()
             raise
 
+    async def commit(self) -> None:
+        """Confirma as escritas pendentes"""
+        await self.connection.commit()
+
+    async def rollback(self) -> None:
+        """Descarta as escritas pendentes"""
+        await self.connection.rollback()
+
     async def close(self) -> None:
         """Fecha a conexão com o banco de dados"""
         if self.connection:
             await self.connection.close()
             self.connection = None
 
-    def _generate_cache_key(self, query: str, params: Tuple) -> str:
-        """Gera uma chave única para cache"""
+    def _generate_cache_key(self, query: str, params: Tuple) -> bytes:
+        """Gera uma chave única para cache (digest blake2b de 8 bytes)"""
         key_str = f"{query}{json.dumps(params)}"
-        return hashlib.md5(key_str.encode()).hexdigest()
-
-    async def _clear_cache_after_ttl(self, key: str) -> None:
-        """Limpa o cache após o tempo de vida expirar"""
-        await asyncio.sleep(self.cache_ttl)
-        self.cache.pop(key, None)
+        return hashlib.blake2b(key_str.encode(), digest_size=8).digest()
 
     async def __aenter__(self):
         return self
@@ -12,14 +12,125 @@ incluindo:
 import json
 import logging
 import asyncio
+import random
+import re
 import time
+from dataclasses import dataclass
 from typing import AsyncGenerator, Optional, Dict, Any
 import aiohttp
-from pydantic import BaseModel, ValidationError
+import orjson
 
 from log_manager import LogManager
 
-class LLMResponse(BaseModel):
+# Correções para respostas da LLM que vêm com sintaxe Python em vez de JSON
+_JSON_FIXUPS = re.compile(r"'|\bTrue\b|\bFalse\b|\bNone\b")
+_JSON_FIXUP_MAP = {"'": '"', "True": "true", "False": "false", "None": "null"}
+_JSON_DECODER = json.JSONDecoder()
+
+# Erros 4xx que ainda podem dar certo numa nova tentativa (timeout, conflito,
+# "too early" e rate limit); os demais 4xx são permanentes
+_RETRYABLE_4XX = frozenset({408, 409, 425, 429})
+# Espera máxima entre tentativas, em segundos
+_MAX_RETRY_DELAY = 60
+
+class PermanentLLMError(Exception):
+    """Erro da LLM que não adianta repetir (ex.: 400, 401, 404, 422)"""
+
+def _decode_json_object(text: str) -> Any:
+    """Decodifica o primeiro objeto JSON do texto, ignorando o que vier antes ou depois dele"""
+    start = text.find('{')
+    if start < 0:
+        raise json.JSONDecodeError("No JSON object found", text, 0)
+    story_data, _ = _JSON_DECODER.raw_decode(text, start)
+    return story_data
+
+# Sessão HTTP compartilhada por todas as instâncias de LLMClient, para que
+# StoryManager e DialogueSystem reaproveitem o mesmo pool de conexões keep-alive
+_shared_session: Optional[aiohttp.ClientSession] = None
+_shared_session_users = 0
+# Buffer de leitura das respostas; o leitor de linhas do aiohttp recusa linhas
+# maiores que o dobro dele, e um único evento SSE pode trazer um trecho grande
+_READ_BUFSIZE = 2 ** 20
+
+async def _acquire_session(timeout: aiohttp.ClientTimeout, keepalive_timeout: int) -> aiohttp.ClientSession:
+    """Retorna a sessão compartilhada, criando-a no primeiro uso
+
+    A sessão fica presa ao loop de eventos que a criou; se um loop anterior
+    terminou sem fechar seus clientes, uma nova sessão é criada para o atual.
+    """
+    global _shared_session, _shared_session_users
+    if (_shared_session is None or _shared_session.closed
+            or _shared_session._loop is not asyncio.get_running_loop()):
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=32,
+            ttl_dns_cache=300,
+            keepalive_timeout=keepalive_timeout,
+            force_close=False,
+            enable_cleanup_closed=True
+        )
+        _shared_session = aiohttp.ClientSession(
+            timeout=timeout,
+            connector=connector,
+            headers={"Connection": "keep-alive"},
+            read_bufsize=_READ_BUFSIZE
+        )
+        _shared_session_users = 0
+    _shared_session_users += 1
+    return _shared_session
+
+async def _release_session(session: aiohttp.ClientSession) -> None:
+    """Libera a sessão compartilhada; fecha-a quando não há mais usuários"""
+    global _shared_session, _shared_session_users
+    if session is not _shared_session:
+        # Sessão de um loop anterior, já substituída; não conta como usuário
+        # da sessão atual
+        return
+    _shared_session_users -= 1
+    if _shared_session_users <= 0 and _shared_session is not None:
+        await _shared_session.close()
+        _shared_session = None
+        _shared_session_users = 0
+
+# Prompt de sistema usado por generate(); formatado uma vez por instância
+_SYSTEM_PROMPT_TEMPLATE = """Você é um assistente criativo especializado em criar histórias envolventes e bem estruturadas. 
+SEMPRE retorne APENAS um JSON válido e bem formatado, sem nenhum texto adicional.
+
+FORMATO EXATO REQUERIDO:
+{{
+  "title": "Título criativo e descritivo",
+  "summary": "Resumo narrativo de 2-3 frases que conta a história principal",
+  "characters": [
+    {{
+      "name": "Nome completo do personagem",
+      "description": "Descrição física e psicológica detalhada"
+    }}
+  ],
+  "locations": [
+    {{
+      "name": "Nome descritivo do local",
+      "description": "Descrição atmosférica e detalhes importantes"
+    }}
+  ]
+}}
+
+REGRAS ESTRITAS:
+1. O JSON DEVE ser válido e bem formatado
+2. O JSON DEVE começar com {{ e terminar com }}
+3. O JSON DEVE usar apenas aspas duplas
+4. O JSON NÃO pode conter quebras de linha ou espaços extras
+5. O JSON NÃO pode conter texto fora da estrutura
+6. O campo 'summary' DEVE conter a história completa
+7. Cada personagem DEVE ter name e description
+8. Cada local DEVE ter name e description
+9. NUNCA inclua texto fora do JSON
+10. NUNCA inclua comentários ou explicações
+11. TODAS as respostas DEVEM estar no idioma {language}
+
+Se você não seguir estas regras exatamente, o sistema falhará."""
+
+@dataclass(frozen=True, slots=True)
+class LLMResponse:
     content: str
     tokens_used: int = 0
     finish_reason: Optional[str] = None
@@ -30,6 +141,10 @@ class LLMClient:
         self.base_url = config.get('base_url', 'http://localhost:1234')
         self.base_url = self.base_url.rstrip('/')
         self.api_key = config.get('api_key', 'lm-studio')
+        self._chat_url = f"{self.base_url}/chat/completions"
+        self._headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            self._headers["Authorization"] = f"Bearer {self.api_key}"
         self._session = None
         self.model = config.get('model', 'mistral')
         self.temperature = config.get('temperature', 0.7)
@@ -41,93 +156,129 @@ class LLMClient:
         self.heartbeat_interval = 30
         self.language = config.get('language', 'pt')
         self.log_manager = log_manager
+        self._system_message = {
+            "role": "system",
+            "content": _SYSTEM_PROMPT_TEMPLATE.format(language=self.language)
+        }
 
     async def initialize(self):
         if not self._session:
-            connector = aiohttp.TCPConnector(
-                keepalive_timeout=self.keepalive_timeout,
-                force_close=False,
-                enable_cleanup_closed=True
-            )
-            self._session = aiohttp.ClientSession(
-                timeout=self.timeout,
-                connector=connector,
-                headers={"Connection": "keep-alive"}
-            )
+            self._session = await _acquire_session(self.timeout, self.keepalive_timeout)
         return self
 
+    async def _raise_for_status(self, response: aiohttp.ClientResponse, attempt: int) -> None:
+        """Levanta o erro adequado se a resposta da LLM não for 200"""
+        if response.status == 200:
+            return
+        error_msg = await response.text()
+        self.log_manager.error("llm_client", "LLM request failed (attempt %d): %d - %s", attempt + 1, response.status, error_msg)
+        if 400 <= response.status < 500 and response.status not in _RETRYABLE_4XX:
+            raise PermanentLLMError(f"Request failed with status {response.status}: {error_msg}")
+        raise Exception(f"Request failed with status {response.status}: {error_msg}")
+
+    def _next_retry_delay(self, delay: float) -> float:
+        """Backoff com jitter descorrelacionado, para que vários clientes
+        não voltem a bater no servidor ao mesmo tempo"""
+        return min(_MAX_RETRY_DELAY, random.uniform(self.retry_delay, delay * 3))
+
     async def _make_request_with_retry(self, url: str, headers: dict, payload: dict) -> Any:
         attempt = 0
         last_error = None
+        delay = self.retry_delay
+        # Serializa uma única vez, mesmo que a requisição seja repetida
+        body = orjson.dumps(payload)
         
         while attempt < self.retry_attempts:
             try:
-                async with self._session.post(url, headers=headers, json=payload) as response:
-                    if response.status != 200:
-                        error_msg = await response.text()
-                        self.log_manager.error("llm_client", f"LLM request failed (attempt {attempt + 1}): {response.status} - {error_msg}")
-                        raise Exception(f"Request failed with status {response.status}: {error_msg}")
-                    
-                    if payload.get("stream", False):
-                        return response
-                    else:
-                        return await response.json()
+                async with self._session.post(url, headers=headers, data=body) as response:
+                    await self._raise_for_status(response, attempt)
+                    return orjson.loads(await response.read())
                         
+            except PermanentLLMError:
+                raise
             except Exception as e:
                 last_error = e
                 attempt += 1
                 if attempt < self.retry_attempts:
-                    delay = self.retry_delay * (2 ** (attempt - 1))
-                    self.log_manager.warning("llm_client", f"Retry attempt {attempt} after {delay}s. Error: {str(e)}")
+                    delay = self._next_retry_delay(delay)
+                    self.log_manager.warning("llm_client", "Retry attempt %d after %.2fs. Error: %s", attempt, delay, e)
                     await asyncio.sleep(delay)
                     
         raise Exception(f"Failed after {self.retry_attempts} attempts. Last error: {str(last_error)}")
 
+    def _stream_event_content(self, data: bytes) -> Optional[str]:
+        """Extrai o texto do delta de um evento SSE já completo
+
+        Eventos sem choices (ex.: o último, só com usage) não têm texto; eventos
+        de erro do servidor viram exceção com a mensagem enviada por ele.
+        """
+        event = orjson.loads(data)
+        error = event.get("error")
+        if error is not None:
+            message = error.get("message", error) if isinstance(error, dict) else error
+            raise Exception(f"LLM stream error: {message}")
+        choices = event.get("choices")
+        if not choices:
+            return None
+        return choices[0].get("delta", {}).get("content")
+
+    async def _stream_with_retry(self, url: str, headers: dict, payload: dict) -> AsyncGenerator[str, None]:
+        """Faz uma requisição em streaming e devolve o texto de cada evento SSE
+
+        A requisição só é repetida se falhar antes do primeiro trecho; depois
+        disso o texto já foi entregue ao chamador e o erro é propagado.
+        """
+        attempt = 0
+        delay = self.retry_delay
+        body = orjson.dumps(payload)
+
+        while True:
+            started = False
+            try:
+                async with self._session.post(url, headers=headers, data=body) as response:
+                    await self._raise_for_status(response, attempt)
+                    # Um evento SSE pode ter várias linhas "data:" e só termina
+                    # na linha em branco; o JSON é decodificado uma vez por evento
+                    fragments = []
+                    async for line in response.content:
+                        line = line.strip()
+                        if line.startswith(b"data:"):
+                            fragments.append(line[5:].strip())
+                            continue
+                        if line or not fragments:
+                            continue
+                        data = b"\n".join(fragments)
+                        fragments.clear()
+                        if data == b"[DONE]":
+                            return
+                        content = self._stream_event_content(data)
+                        if content:
+                            started = True
+                            yield content
+
+                    # Servidores que fecham a conexão sem a linha em branco final
+                    data = b"\n".join(fragments)
+                    if fragments and data != b"[DONE]":
+                        content = self._stream_event_content(data)
+                        if content:
+                            yield content
+                    return
+
+            except PermanentLLMError:
+                raise
+            except Exception as e:
+                attempt += 1
+                if started or attempt >= self.retry_attempts:
+                    raise
+                delay = self._next_retry_delay(delay)
+                self.log_manager.warning("llm_client", "Stream retry attempt %d after %.2fs. Error: %s", attempt, delay, e)
+                await asyncio.sleep(delay)
+
     async def generate(self, prompt: str, **kwargs) -> LLMResponse:
-        url = f"{self.base_url}/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
         payload = {
             "model": self.model,
             "messages": [
-                {"role": "system", "content": f"""Você é um assistente criativo especializado em criar histórias envolventes e bem estruturadas. 
-SEMPRE retorne APENAS um JSON válido e bem formatado, sem nenhum texto adicional.
-
-FORMATO EXATO REQUERIDO:
-{{
-  "title": "Título criativo e descritivo",
-  "summary": "Resumo narrativo de 2-3 frases que conta a história principal",
-  "characters": [
-    {{
-      "name": "Nome completo do personagem",
-      "description": "Descrição física e psicológica detalhada"
-    }}
-  ],
-  "locations": [
-    {{
-      "name": "Nome descritivo do local",
-      "description": "Descrição atmosférica e detalhes importantes"
-    }}
-  ]
-}}
-
-REGRAS ESTRITAS:
-1. O JSON DEVE ser válido e bem formatado
-2. O JSON DEVE começar com {{ e terminar com }}
-3. O JSON DEVE usar apenas aspas duplas
-4. O JSON NÃO pode conter quebras de linha ou espaços extras
-5. O JSON NÃO pode conter texto fora da estrutura
-6. O campo 'summary' DEVE conter a história completa
-7. Cada personagem DEVE ter name e description
-8. Cada local DEVE ter name e description
-9. NUNCA inclua texto fora do JSON
-10. NUNCA inclua comentários ou explicações
-11. TODAS as respostas DEVEM estar no idioma {self.language}
-
-Se você não seguir estas regras exatamente, o sistema falhará."""},
+                self._system_message,
                 {"role": "user", "content": prompt}
             ],
             "stream": False,
@@ -137,7 +288,7 @@ Se você não seguir estas regras exatamente, o sistema falhará."""},
         }
 
         try:
-            response = await self._make_request_with_retry(url, headers, payload)
+            response = await self._make_request_with_retry(self._chat_url, self._headers, payload)
             
             if not isinstance(response, dict) or "choices" not in response:
                 raise Exception("Invalid response format from LLM")
@@ -146,15 +297,49 @@ Se você não seguir estas regras exatamente, o sistema falhará."""},
             message = choice.get("message", {})
             
             return LLMResponse(
-                content=message.get("content", ""),
+                content=message.get("content") or "",
                 tokens_used=response.get("usage", {}).get("total_tokens", 0),
                 finish_reason=choice.get("finish_reason")
             )
 
         except Exception as e:
-            self.log_manager.error("llm_client", f"Error in generate: {str(e)}")
+            self.log_manager.error("llm_client", "Error in generate: %s", e)
             raise
 
+    async def generate_stream(self, prompt: str, batch_size: int = 1, **kwargs) -> AsyncGenerator[str, None]:
+        """Gera texto em streaming, devolvendo os trechos conforme chegam da LLM
+
+        Args:
+            prompt: Texto enviado ao modelo
+            batch_size: Quantos trechos juntar antes de cada yield; valores
+                maiores reduzem as trocas de contexto em modelos rápidos
+        """
+        payload = {
+            "model": self.model,
+            "messages": [
+                self._system_message,
+                {"role": "user", "content": prompt}
+            ],
+            "stream": True,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            **kwargs
+        }
+
+        if batch_size <= 1:
+            async for content in self._stream_with_retry(self._chat_url, self._headers, payload):
+                yield content
+            return
+
+        pending = []
+        async for content in self._stream_with_retry(self._chat_url, self._headers, payload):
+            pending.append(content)
+            if len(pending) >= batch_size:
+                yield "".join(pending)
+                pending.clear()
+        if pending:
+            yield "".join(pending)
+
     async def generate_story(self, prompt: str) -> Dict[str, Any]:
         last_error = None
         max_retries = 5
@@ -172,29 +357,15 @@ Se você não seguir estas regras exatamente, o sistema falhará."""},
                     raise Exception(f"Response too short: {len(story_content)} chars")
 
                 try:
-                    # Tenta encontrar o JSON na resposta
-                    json_str = story_content.strip()
-                    
-                    # Remove possíveis textos antes e depois do JSON
-                    if not json_str.startswith('{'):
-                        start = json_str.find('{')
-                        if start >= 0:
-                            json_str = json_str[start:]
-                    
-                    if not json_str.endswith('}'):
-                        end = json_str.rfind('}') + 1
-                        if end > 0:
-                            json_str = json_str[:end]
-                    
-                    # Tenta parsear o JSON
+                    # Decodifica o JSON direto da resposta, ignorando textos
+                    # antes e depois dele sem recortar a string
                     try:
-                        story_data = json.loads(json_str)
+                        story_data = _decode_json_object(story_content)
                     except json.JSONDecodeError as e:
                         # Tenta corrigir problemas comuns de formatação
-                        json_str = json_str.replace("'", '"')  # Substitui aspas simples por duplas
-                        json_str = json_str.replace("True", "true").replace("False", "false")  # Corrige booleanos
-                        json_str = json_str.replace("None", "null")  # Corrige valores nulos
-                        story_data = json.loads(json_str)
+                        # (aspas simples, booleanos e None) numa única passada
+                        json_str = _JSON_FIXUPS.sub(lambda m: _JSON_FIXUP_MAP[m.group(0)], story_content)
+                        story_data = _decode_json_object(json_str)
                     
                     # Verifica se é o formato de múltiplas histórias
                     if "stories" in story_data:
@@ -227,21 +398,15 @@ Se você não seguir estas regras exatamente, o sistema falhará."""},
                         }
 
                 except json.JSONDecodeError as e:
-                    self.log_manager.error("llm_client", f"Failed to parse JSON from response: {e}\nContent: {story_content}")
-                    # Tenta usar uma estratégia de fallback para extrair o JSON
-                    try:
-                        # Remove possíveis textos antes e depois do JSON
-                        json_str = story_content[story_content.find('{'):story_content.rfind('}')+1]
-                        # Tenta parsear novamente
-                        story_data = json.loads(json_str)
-                        return story_data
-                    except Exception as fallback_error:
-                        self.log_manager.error("llm_client", f"Fallback parsing also failed: {fallback_error}")
-                        raise Exception("LLM response was not in the expected JSON format")
+                    self.log_manager.error("llm_client", "Failed to parse JSON from response: %s\nContent: %s", e, story_content)
+                    raise Exception("LLM response was not in the expected JSON format")
+
+            except PermanentLLMError:
+                raise
 
             except aiohttp.ClientConnectionError as e:
                 last_error = e
-                self.log_manager.warning("llm_client", f"Connection error (attempt {attempt + 1}): {str(e)}")
+                self.log_manager.warning("llm_client", "Connection error (attempt %d): %s", attempt + 1, e)
                 if attempt < max_retries - 1:
                     await asyncio.sleep(2 ** attempt)
                     continue
@@ -249,7 +414,7 @@ Se você não seguir estas regras exatamente, o sistema falhará."""},
                 
             except Exception as e:
                 last_error = e
-                self.log_manager.error("llm_client", f"Error generating story (attempt {attempt + 1}): {str(e)}")
+                self.log_manager.error("llm_client", "Error generating story (attempt %d): %s", attempt + 1, e)
                 if attempt < max_retries - 1:
                     await asyncio.sleep(2 ** attempt)
                     continue
@@ -259,8 +424,8 @@ Se você não seguir estas regras exatamente, o sistema falhará."""},
 
     async def close(self):
         if self._session:
-            await self._session.close()
-            self._session = None
+            session, self._session = self._session, None
+            await _release_session(session)
 
     async def __aenter__(self):
         return await self.initialize()
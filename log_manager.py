@@ -1,23 +1,168 @@
+import atexit
 import logging
-from typing import Optional
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Optional, Tuple
+from config import ConfigManager
+
+# Intervalo máximo, em segundos, que um registro espera no buffer do arquivo
+_FLUSH_INTERVAL = 0.5
+
+# Chave em logging.enabled_modules de cada logger cujo nome difere dela
+_MODULE_CONFIG_KEYS = {
+    "story_manager": "story",
+    "llm_client": "llm",
+    "character_manager": "character",
+}
+
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter que reaproveita o timestamp enquanto o segundo não muda
+
+    A thread do QueueListener formata os registros do console e a thread de
+    flush os do arquivo, com a mesma instância. O segundo e o texto ficam numa
+    única tupla, trocada de uma vez, para que nenhuma thread combine o segundo
+    de um registro com o texto de outro; no pior caso o texto é recalculado.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_time: Tuple[Optional[int], str] = (None, "")
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, cached_time = self._cached_time
+        if second != cached_second:
+            cached_time = time.strftime(self.default_time_format, self.converter(record.created))
+            self._cached_time = (second, cached_time)
+        return self.default_msec_format % (cached_time, record.msecs)
+
+class _BatchFileHandler(logging.FileHandler):
+    """FileHandler que só escreve no buffer do arquivo, sem flush a cada registro
+
+    O flush fica a cargo do _BatchMemoryHandler, uma vez por lote.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+class _BatchMemoryHandler(logging.handlers.MemoryHandler):
+    """MemoryHandler que grava o lote inteiro e só então faz um único flush"""
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self.target and self.buffer:
+                super().flush()
+                self.target.flush()
+        finally:
+            self.release()
 
 class LogManager:
+    # Fila e thread de escrita são únicas no processo, mesmo com várias instâncias
+    _queue_handler: Optional[logging.handlers.QueueHandler] = None
+    _listener: Optional[logging.handlers.QueueListener] = None
+    _file_handler: Optional[logging.FileHandler] = None
+    _flush_stop: Optional[threading.Event] = None
+    _flush_thread: Optional[threading.Thread] = None
+
     def __init__(self, config: Optional[dict] = None):
         """Inicializa o gerenciador de logs"""
         self.config = config or {}
         self.loggers = {}
+        # Nível resolvido uma única vez a partir de system.log_level
+        level = logging.getLevelName(str(self.config.get('system.log_level', 'INFO')).upper())
+        self.level = level if isinstance(level, int) else logging.INFO
         self._setup_logging()
 
     def _setup_logging(self):
-        """Configura o sistema de logging"""
-        logging.basicConfig(
-            level=self.config.get('log_level', logging.INFO),
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(self.config.get('log_file', 'taleweaver.log')),
-                logging.StreamHandler()
-            ]
+        """Configura o sistema de logging
+
+        Os registros são enfileirados e gravados por uma thread separada, para
+        que a escrita em arquivo e no console não bloqueie o loop de eventos.
+        """
+        if LogManager._listener is not None:
+            return
+
+        # O formato não usa thread, processo nem arquivo/linha de origem; sem
+        # eles cada LogRecord dispensa a busca no stack e as consultas ao SO
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        logging._srcfile = None
+
+        formatter = _CachedTimeFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        file_handler = _BatchFileHandler(
+            self.config.get('log_file', 'taleweaver.log'),
+            encoding='utf-8',
+            delay=True
         )
+        stream_handler = logging.StreamHandler()
+        file_handler.setFormatter(formatter)
+        stream_handler.setFormatter(formatter)
+
+        # O arquivo recebe os registros em lotes, com um único flush por lote;
+        # erros forçam a gravação imediata e o restante é gravado a cada
+        # _FLUSH_INTERVAL, mesmo com pouco log
+        LogManager._file_handler = file_handler
+        memory_handler = _BatchMemoryHandler(
+            capacity=128,
+            flushLevel=logging.ERROR,
+            target=file_handler
+        )
+        handlers = [memory_handler, stream_handler]
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        root.setLevel(self.level)
+        LogManager._queue_handler = logging.handlers.QueueHandler(log_queue)
+        root.addHandler(LogManager._queue_handler)
+
+        LogManager._listener = logging.handlers.QueueListener(log_queue, *handlers)
+        LogManager._listener.start()
+
+        LogManager._flush_stop = threading.Event()
+        LogManager._flush_thread = threading.Thread(
+            target=LogManager._flush_periodically,
+            args=(memory_handler, LogManager._flush_stop),
+            daemon=True
+        )
+        LogManager._flush_thread.start()
+        atexit.register(LogManager.close)
+
+    @staticmethod
+    def _flush_periodically(handler: logging.Handler, stop: threading.Event) -> None:
+        """Grava o buffer do arquivo em intervalos até o LogManager ser fechado"""
+        while not stop.wait(_FLUSH_INTERVAL):
+            handler.flush()
+
+    @classmethod
+    def close(cls) -> None:
+        """Grava os registros pendentes e encerra a thread de escrita"""
+        if cls._listener is None:
+            return
+        logging.getLogger().removeHandler(cls._queue_handler)
+        cls._flush_stop.set()
+        cls._flush_thread.join()
+        cls._listener.stop()
+        for handler in cls._listener.handlers:
+            handler.close()
+        cls._file_handler.close()
+        cls._listener = None
+        cls._queue_handler = None
+        cls._file_handler = None
+        cls._flush_stop = None
+        cls._flush_thread = None
 
     def get_logger(self, name: str) -> logging.Logger:
         """Obtém ou cria um logger com o nome especificado
@@ -28,46 +173,71 @@ class LogManager:
         Returns:
             Instância do logger configurado
         """
-        if name not in self.loggers:
-            self.loggers[name] = logging.getLogger(name)
-        return self.loggers[name]
+        logger = self.loggers.get(name)
+        if logger is not None:
+            return logger
+        logger = logging.getLogger(name)
+        # Módulos desativados na configuração são descartados pelo próprio
+        # logger, sem filtro consultando a configuração a cada registro
+        logger.disabled = not self._module_enabled(name)
+        self.loggers[name] = logger
+        return logger
+
+    def _module_enabled(self, name: str) -> bool:
+        """Verifica na configuração se o logging do módulo está ativado"""
+        if not isinstance(self.config, ConfigManager):
+            return True
+        return self.config.get_module_logging(_MODULE_CONFIG_KEYS.get(name, name))
+
+    def refresh(self) -> None:
+        """Reaplica aos loggers já criados a configuração de módulos ativados"""
+        for name, logger in self.loggers.items():
+            logger.disabled = not self._module_enabled(name)
 
-    def error(self, logger_name: str, message: str) -> None:
+    def error(self, logger_name: str, message: str, *args) -> None:
         """Registra uma mensagem de erro
         
         Args:
             logger_name: Nome do logger
             message: Mensagem de erro
+            *args: Argumentos da mensagem, formatados com % apenas se o
+                registro for emitido
         """
         logger = self.get_logger(logger_name)
-        logger.error(message)
+        logger.error(message, *args)
 
-    def warning(self, logger_name: str, message: str) -> None:
+    def warning(self, logger_name: str, message: str, *args) -> None:
         """Registra uma mensagem de aviso
         
         Args:
             logger_name: Nome do logger
             message: Mensagem de aviso
+            *args: Argumentos da mensagem, formatados com % apenas se o
+                registro for emitido
         """
         logger = self.get_logger(logger_name)
-        logger.warning(message)
+        logger.warning(message, *args)
 
-    def info(self, logger_name: str, message: str) -> None:
+    def info(self, logger_name: str, message: str, *args) -> None:
         """Registra uma mensagem informativa
         
         Args:
             logger_name: Nome do logger
             message: Mensagem informativa
+            *args: Argumentos da mensagem, formatados com % apenas se o
+                registro for emitido
         """
         logger = self.get_logger(logger_name)
-        logger.info(message)
+        logger.info(message, *args)
 
-    def debug(self, logger_name: str, message: str) -> None:
+    def debug(self, logger_name: str, message: str, *args) -> None:
         """Registra uma mensagem de debug
         
         Args:
             logger_name: Nome do logger
             message: Mensagem de debug
+            *args: Argumentos da mensagem, formatados com % apenas se o
+                registro for emitido
         """
         logger = self.get_logger(logger_name)
-        logger.debug(message)
\ No newline at end of file
+        logger.debug(message, *args)
\ No newline at end of file
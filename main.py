@@ -14,7 +14,9 @@ import asyncio
 import sys
 from typing import Optional, Dict, Any
 from config import ConfigManager
+from console import ainput
 from database import AsyncDatabaseManager
+from log_manager import LogManager
 from story_manager import StoryManager
 from narrator_system import NarratorSystem
 
@@ -30,8 +32,8 @@ class TaleWeaverApp:
         """Inicializa o sistema TaleWeaver"""
         try:
             # Configura LogManager
-            from log_manager import LogManager
             self.log_manager = LogManager(self.config)
+            self.config.on_module_logging_change(self.log_manager.refresh)
             self.log_manager.info("main", "Inicializando TaleWeaver...")
             
             # Inicializa banco de dados
@@ -48,7 +50,7 @@ class TaleWeaverApp:
             
             # Inicializa gerenciador de histórias
             print("Inicializando gerenciador de histórias...")
-            self.story_manager = StoryManager(self.config, self.db)
+            self.story_manager = StoryManager(self.config, self.db, self.log_manager)
             if not self.story_manager:
                 raise ValueError("Falha ao criar gerenciador de histórias")
             await self.story_manager.initialize()
@@ -91,7 +93,7 @@ class TaleWeaverApp:
             print(f"- Banco de dados: {'OK' if self.db else 'Falha'}")
             print(f"- Gerenciador de histórias: {'OK' if self.story_manager else 'Falha'}")
             print(f"- Sistema de narradores: {'OK' if self.narrator_system else 'Falha'}")
-            print(f"- Sistema de voz: {'OK' if hasattr(self.config, 'voice_system') else 'Falha'}")
+            print(f"- Sistema de voz: {'OK' if self.config.voice_system else 'Falha'}")
             sys.exit(1)
 
 
@@ -102,7 +104,8 @@ class TaleWeaverApp:
                 await self._show_main_menu()
                 choice = await self._get_user_choice()
                 await self._handle_menu_choice(choice)
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            # Com a leitura do teclado fora do loop, o Ctrl+C chega como cancelamento
             print("\nEncerrando TaleWeaver...")
         except Exception as e:
             print(f"Erro durante execução: {e}")
@@ -122,7 +125,7 @@ class TaleWeaverApp:
         """Obtém a escolha do usuário"""
         while True:
             try:
-                choice = input("\nEscolha uma opção: ")
+                choice = await ainput("\nEscolha uma opção: ")
                 return int(choice)
             except ValueError:
                 print("Por favor, insira um número válido.")
@@ -156,7 +159,7 @@ class TaleWeaverApp:
             await self._interact_with_characters()
             
         except Exception as e:
-            self.log_manager.error("main", f"Erro ao criar nova história: {str(e)}")
+            self.log_manager.error("main", "Erro ao criar nova história: %s", e)
             print(f"\nErro ao criar nova história: {e}")
 
     async def _create_main_characters(self) -> None:
@@ -178,10 +181,10 @@ class TaleWeaverApp:
         if not self.config.character_manager:
             return
             
-        player_name = input("\nDigite o nome do seu personagem: ")
+        player_name = await ainput("\nDigite o nome do seu personagem: ")
         player_role = "Player"
         player_desc = "O protagonista controlado pelo jogador"
-        player_personality = input("Descreva a personalidade do seu personagem: ")
+        player_personality = await ainput("Descreva a personalidade do seu personagem: ")
         
         await self.config.character_manager.create_character(
             name=player_name,
@@ -260,7 +263,7 @@ class TaleWeaverApp:
             print(f"{i}. {character['name']} - {character['role']}")
         
         try:
-            choice = int(input("\nEscolha um personagem: "))
+            choice = int(await ainput("\nEscolha um personagem: "))
             if 1 <= choice <= len(self.current_story["characters"]):
                 selected_char = self.current_story["characters"][choice - 1]
                 await self._start_conversation(selected_char)
@@ -294,7 +297,7 @@ class TaleWeaverApp:
             
             while True:
                 try:
-                    user_input = input("\nVocê: ")
+                    user_input = await ainput("\nVocê: ")
                     if user_input.lower() in ["sair", "voltar"]:
                         break
                         
@@ -326,12 +329,12 @@ class TaleWeaverApp:
                     
                 except Exception as e:
                     print(f"Erro durante a conversa: {e}")
-                    self.log_manager.error("main", f"Erro na conversa com {character['name']}: {str(e)}")
+                    self.log_manager.error("main", "Erro na conversa com %s: %s", character['name'], e)
                     break
                     
         except Exception as e:
             print(f"Erro ao iniciar conversa: {e}")
-            self.log_manager.error("main", f"Erro ao iniciar conversa com {character['name']}: {str(e)}")
+            self.log_manager.error("main", "Erro ao iniciar conversa com %s: %s", character['name'], e)
 
     async def _manage_characters(self) -> None:
         """Gerencia os personagens da história"""
@@ -361,7 +364,7 @@ class TaleWeaverApp:
             print(f"- {loc['name']}: {loc['description']}")
             
         print("\nPressione Enter para continuar...")
-        input()
+        await ainput()
 
     async def _reset_story(self) -> None:
         """Reseta a história atual, apagando todos os dados"""
@@ -373,7 +376,7 @@ class TaleWeaverApp:
         print("- Lembranças")
         print("\nEsta ação é PERMANENTE e IRREVERSÍVEL!")
         
-        confirm = input("\nTem certeza que deseja continuar? (s/n): ").lower()
+        confirm = (await ainput("\nTem certeza que deseja continuar? (s/n): ")).lower()
         if confirm != 's':
             print("Reset cancelado.")
             return
@@ -391,18 +394,19 @@ class TaleWeaverApp:
             ]
             
             for table in tables:
-                await self.db.execute_write(f"DELETE FROM {table}")
+                await self.db.execute_write(f"DELETE FROM {table}", commit=False)
                 print(f"Dados da tabela {table} apagados.")
                 
             # Reinicia as sequências de IDs
-            await self.db.execute_write("DELETE FROM sqlite_sequence")
+            await self.db.execute_write("DELETE FROM sqlite_sequence", commit=False)
+            await self.db.commit()
                 
             self.current_story = None
             self.active_story_id = None
             
             print("\nHistória resetada com sucesso! Todos os dados foram apagados.")
             print("Pressione Enter para continuar...")
-            input()
+            await ainput()
             
         except Exception as e:
             print(f"\nErro ao resetar história: {e}")
@@ -434,7 +438,7 @@ class TaleWeaverApp:
         print("   - Voz: narrator_sassy.wav")
         
         try:
-            choice = int(input("\nEscolha um narrador: "))
+            choice = int(await ainput("\nEscolha um narrador: "))
             if choice == 1:
                 await self.narrator_system.set_narrator('descriptive')
                 print("Narrador Descritivo selecionado!")
@@ -495,7 +499,7 @@ class TaleWeaverApp:
             return response.choices[0].message.content
             
         except Exception as e:
-            self.log_manager.error("main", f"Erro ao gerar resposta LLM: {str(e)}")
+            self.log_manager.error("main", "Erro ao gerar resposta LLM: %s", e)
             return f"Desculpe, estou tendo dificuldades para responder. Erro: {str(e)}"
 
     def _process_llm_response(self, response: str) -> tuple[str, str]:
@@ -508,14 +512,10 @@ class TaleWeaverApp:
             Tupla contendo (narração, diálogo)
         """
         try:
-            # Separa narração (se existir) do diálogo
-            if "Narrador:" in response:
-                narration_part, dialogue_part = response.split("Narrador:", 1)
-                narration = narration_part.strip()
-                dialogue = dialogue_part.strip()
-            else:
-                narration = ""
-                dialogue = response.strip()
+            # Separa narração (se existir) do diálogo numa única busca
+            narration, found, dialogue = response.partition("Narrador:")
+            if not found:
+                narration, dialogue = "", narration
                 
             # Limpa formatação básica
             narration = narration.replace("*", "").strip()
@@ -528,7 +528,7 @@ class TaleWeaverApp:
             return narration, dialogue
             
         except Exception as e:
-            self.log_manager.error("main", f"Erro ao processar resposta LLM: {str(e)}")
+            self.log_manager.error("main", "Erro ao processar resposta LLM: %s", e)
             return "", f"Desculpe, houve um erro ao processar minha resposta."
 
     async def _get_conversation_history(self, character_id: str) -> list[str]:
@@ -556,7 +556,7 @@ class TaleWeaverApp:
             return formatted_history
             
         except Exception as e:
-            self.log_manager.error("main", f"Erro ao recuperar histórico de conversas: {str(e)}")
+            self.log_manager.error("main", "Erro ao recuperar histórico de conversas: %s", e)
             return []
 
     async def _get_character_relationships(self, character_id: str) -> list[str]:
@@ -590,7 +590,7 @@ class TaleWeaverApp:
             return formatted_relationships
             
         except Exception as e:
-            self.log_manager.error("main", f"Erro ao recuperar relacionamentos: {str(e)}")
+            self.log_manager.error("main", "Erro ao recuperar relacionamentos: %s", e)
             return []
 
     async def _update_conversation_history(
@@ -620,7 +620,7 @@ class TaleWeaverApp:
             )
             
         except Exception as e:
-            self.log_manager.error("main", f"Erro ao atualizar histórico de conversas: {str(e)}")
+            self.log_manager.error("main", "Erro ao atualizar histórico de conversas: %s", e)
 
     async def _play_character_voice(self, character: Dict[str, Any], text: str) -> None:
         """Reproduz a voz do personagem para o texto fornecido
@@ -646,7 +646,7 @@ class TaleWeaverApp:
             await self.config.voice_system.play_audio(audio_data)
             
         except Exception as e:
-            self.log_manager.error("main", f"Erro ao reproduzir voz do personagem: {str(e)}")
+            self.log_manager.error("main", "Erro ao reproduzir voz do personagem: %s", e)
             print(f"Erro ao reproduzir voz: {str(e)}")
 
     async def _play_narrator_voice(self, text: str) -> None:
@@ -669,7 +669,7 @@ class TaleWeaverApp:
             await self.config.voice_system.play_audio(audio_data)
             
         except Exception as e:
-            self.log_manager.error("main", f"Erro ao reproduzir voz do narrador: {str(e)}")
+            self.log_manager.error("main", "Erro ao reproduzir voz do narrador: %s", e)
             print(f"Erro ao reproduzir narração: {str(e)}")
 
     async def cleanup(self) -> None:
@@ -679,6 +679,18 @@ class TaleWeaverApp:
         if self.story_manager:
             await self.story_manager.close()
         print("TaleWeaver encerrado com sucesso.")
+        LogManager.close()
+
+def _install_event_loop_policy() -> None:
+    """Usa o loop do libuv (uvloop/winloop) quando estiver instalado"""
+    try:
+        if sys.platform == "win32":
+            import winloop as fast_loop
+        else:
+            import uvloop as fast_loop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(fast_loop.EventLoopPolicy())
 
 async def main():
     app = TaleWeaverApp()
@@ -686,4 +698,8 @@ async def main():
     await app.run()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    _install_event_loop_policy()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -91,7 +91,7 @@ class NarratorSystem:
         print(f"Narrador configurado para: {self.narrators[narrator_type]['name']}")
         
         # Atualiza o sistema de voz com o novo narrador
-        if hasattr(self.config, 'voice_system'):
+        if self.config.voice_system is not None:
             await self.config.voice_system.set_narrator_voice(
                 self.narrators[narrator_type]['voice']
             )
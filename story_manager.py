@@ -15,17 +15,70 @@ import json
 import aiohttp
 from typing import Dict, List, Optional, Tuple, Union, Any
 from config import ConfigManager
+from console import ainput
 from log_manager import LogManager
 from database import AsyncDatabaseManager
 from datetime import datetime
 from llm_client import LLMClient, LLMResponse
 from dialogue_system import DialogueSystem
 
+# Prompt de geração das opções de história; só o gênero varia entre chamadas
+_STORY_OPTIONS_PROMPT_TEMPLATE = """Você é um assistente que gera histórias criativas. Crie 3 opções de histórias completas no gênero {genre}, seguindo rigorosamente estas instruções:
+
+1. Cada história deve ter:
+   - Título: Criativo e relevante ao gênero
+   - Resumo: 2-3 parágrafos bem escritos
+   - Personagens: 2-3 principais com:
+     * Nome
+     * Descrição física
+     * Personalidade (traços psicológicos, comportamento, motivações)
+     * Papel na história
+   - Locais: 1-2 importantes com:
+     * Nome
+     * Descrição detalhada
+     * Relevância para a trama
+
+2. Formato de resposta:
+   - Retorne APENAS um JSON válido
+   - Sem comentários ou texto adicional
+   - Sempre use aspas duplas
+   - Sem trailing commas
+
+3. Exemplo de estrutura:
+{{
+    "stories": [
+        {{
+            "title": "Título da História",
+            "summary": "Resumo detalhado...",
+            "characters": [
+                {{
+                    "name": "Nome do Personagem",
+                    "description": "Descrição completa",
+                    "role": "Protagonista/Antagonista/etc"
+                }}
+            ],
+            "locations": [
+                {{
+                    "name": "Nome do Local",
+                    "description": "Descrição detalhada"
+                }}
+            ]
+        }}
+    ]
+}}
+
+4. Regras adicionais:
+   - Cada história deve ser única e criativa
+   - Mantenha consistência com o gênero {genre}
+   - Desenvolva personagens complexos e interessantes
+   - Crie locais memoráveis e relevantes para a trama"""
+
 class StoryManager:
-    def __init__(self, config: ConfigManager, db: AsyncDatabaseManager):
+    def __init__(self, config: ConfigManager, db: AsyncDatabaseManager,
+                 log_manager: Optional[LogManager] = None):
         self.config = config
         self.db = db
-        self.log_manager = LogManager(config)
+        self.log_manager = log_manager or LogManager(config)
         self.genres = {}
         self.current_story: Optional[Dict[str, Any]] = None
         self.current_scene: Optional[Dict[str, Any]] = None
@@ -118,16 +171,16 @@ class StoryManager:
     async def _select_genre(self) -> str:
         """Permite ao usuário selecionar um gênero"""
         self.log_manager.debug("story_manager", "Iniciando seleção de gênero")
-        print("\nSelecione um gênero:")
-        for key, value in self.genres.items():
-            print(f"{key}. {value}")
+        lines = ["\nSelecione um gênero:"]
+        lines.extend(f"{key}. {value}" for key, value in self.genres.items())
+        print("\n".join(lines))
         
         while True:
             try:
-                choice = int(input("\nEscolha um gênero (0-9): "))
+                choice = int(await ainput("\nEscolha um gênero (0-9): "))
                 if choice in self.genres:
                     selected_genre = self.genres[choice]
-                    self.log_manager.debug("story_manager", f"Gênero selecionado: {selected_genre}")
+                    self.log_manager.debug("story_manager", "Gênero selecionado: %s", selected_genre)
                     return selected_genre
                 print("Opção inválida. Tente novamente.")
             except ValueError:
@@ -135,57 +188,9 @@ class StoryManager:
 
     async def _generate_story_options(self, genre: str) -> List[Dict[str, str]]:
         """Gera opções de história usando LLM"""
-        self.log_manager.info("story_manager", f"Gerando opções de história para o gênero: {genre}")
+        self.log_manager.info("story_manager", "Gerando opções de história para o gênero: %s", genre)
         
-        prompt = f"""Você é um assistente que gera histórias criativas. Crie 3 opções de histórias completas no gênero {genre}, seguindo rigorosamente estas instruções:
-
-1. Cada história deve ter:
-   - Título: Criativo e relevante ao gênero
-   - Resumo: 2-3 parágrafos bem escritos
-   - Personagens: 2-3 principais com:
-     * Nome
-     * Descrição física
-     * Personalidade (traços psicológicos, comportamento, motivações)
-     * Papel na história
-   - Locais: 1-2 importantes com:
-     * Nome
-     * Descrição detalhada
-     * Relevância para a trama
-
-2. Formato de resposta:
-   - Retorne APENAS um JSON válido
-   - Sem comentários ou texto adicional
-   - Sempre use aspas duplas
-   - Sem trailing commas
-
-3. Exemplo de estrutura:
-{{
-    "stories": [
-        {{
-            "title": "Título da História",
-            "summary": "Resumo detalhado...",
-            "characters": [
-                {{
-                    "name": "Nome do Personagem",
-                    "description": "Descrição completa",
-                    "role": "Protagonista/Antagonista/etc"
-                }}
-            ],
-            "locations": [
-                {{
-                    "name": "Nome do Local",
-                    "description": "Descrição detalhada"
-                }}
-            ]
-        }}
-    ]
-}}
-
-4. Regras adicionais:
-   - Cada história deve ser única e criativa
-   - Mantenha consistência com o gênero {genre}
-   - Desenvolva personagens complexos e interessantes
-   - Crie locais memoráveis e relevantes para a trama"""
+        prompt = _STORY_OPTIONS_PROMPT_TEMPLATE.format(genre=genre)
 
         try:
             result = await self.llm_client.generate_story(prompt)
@@ -195,37 +200,37 @@ class StoryManager:
                     result = json.loads(result)
                     self.log_manager.debug("story_manager", "JSON convertido com sucesso de string para dict")
                 except json.JSONDecodeError as e:
-                    self.log_manager.error("story_manager", f"Falha ao converter JSON string para dict: {e}")
+                    self.log_manager.error("story_manager", "Falha ao converter JSON string para dict: %s", e)
                     raise ValueError(f"Erro ao decodificar JSON: {e}")
             
             return await self._validate_stories(result)
             
         except Exception as e:
-            self.log_manager.error("story_manager", f"Erro ao gerar histórias: {e}")
+            self.log_manager.error("story_manager", "Erro ao gerar histórias: %s", e)
             return self._get_fallback_stories(genre)
 
     async def _validate_stories(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Valida o formato das histórias retornadas pela LLM"""
         try:
             if not isinstance(result, dict):
-                self.log_manager.error("story_manager", f"Resultado não é um dicionário: {type(result)}")
+                self.log_manager.error("story_manager", "Resultado não é um dicionário: %s", type(result))
                 raise ValueError("Formato JSON inválido - esperado um objeto/dicionário")
             
             if "stories" not in result:
-                self.log_manager.error("story_manager", f"Chave 'stories' faltando no JSON: {result.keys()}")
+                self.log_manager.error("story_manager", "Chave 'stories' faltando no JSON: %s", result.keys())
                 raise ValueError("Formato JSON inválido - falta chave 'stories'")
             
             stories = result["stories"]
             if not isinstance(stories, list):
-                self.log_manager.error("story_manager", f"Valor de 'stories' não é uma lista: {type(stories)}")
+                self.log_manager.error("story_manager", "Valor de 'stories' não é uma lista: %s", type(stories))
                 raise ValueError("Formato JSON inválido - 'stories' deve ser uma lista")
             
-            self.log_manager.debug("story_manager", f"Número de histórias recebidas: {len(stories)}")
+            self.log_manager.debug("story_manager", "Número de histórias recebidas: %d", len(stories))
             
             validated_stories = []
             for idx, story in enumerate(stories):
                 if not isinstance(story, dict):
-                    self.log_manager.warning("story_manager", f"História {idx} ignorada - não é um dicionário")
+                    self.log_manager.warning("story_manager", "História %d ignorada - não é um dicionário", idx)
                     continue
                     
                 required_fields = ["title", "summary", "characters", "locations"]
@@ -237,7 +242,7 @@ class StoryManager:
                 
                 characters = story.get("characters", [])
                 if not isinstance(characters, list):
-                    self.log_manager.warning("story_manager", f"História {idx} - personagens não é uma lista")
+                    self.log_manager.warning("story_manager", "História %d - personagens não é uma lista", idx)
                     continue
                 
                 valid_characters = []
@@ -249,7 +254,7 @@ class StoryManager:
                     valid_characters.append(char)
                 
                 if not valid_characters:
-                    self.log_manager.warning("story_manager", f"História {idx} - nenhum personagem válido")
+                    self.log_manager.warning("story_manager", "História %d - nenhum personagem válido", idx)
                     continue
                 
                 validated_story = {
@@ -264,11 +269,11 @@ class StoryManager:
             if not validated_stories:
                 raise ValueError("Nenhuma história válida após validação")
             
-            self.log_manager.info("story_manager", f"Retornando {len(validated_stories)} histórias validadas")
+            self.log_manager.info("story_manager", "Retornando %d histórias validadas", len(validated_stories))
             return validated_stories
             
         except Exception as e:
-            self.log_manager.error("story_manager", f"Erro na validação: {str(e)}")
+            self.log_manager.error("story_manager", "Erro na validação: %s", e)
             raise ValueError(f"Erro na validação: {str(e)}")
 
     def _get_fallback_stories(self, genre: str) -> List[Dict[str, str]]:
@@ -304,28 +309,30 @@ class StoryManager:
         if not stories:
             raise ValueError("Nenhuma opção de história disponível")
             
-        self.log_manager.debug("story_manager", f"Apresentando {len(stories)} opções de história")
-        print("\nOpções de história geradas:")
+        self.log_manager.debug("story_manager", "Apresentando %d opções de história", len(stories))
+        # Monta o menu inteiro e escreve de uma vez, em vez de um print por linha
+        lines = ["\nOpções de história geradas:"]
         
         for idx, story in enumerate(stories, 1):
-            print(f"\n{idx}. {story['title']}")
-            print(f"Resumo: {story['summary']}\n")
-            print("Personagens:")
+            lines.append(f"\n{idx}. {story['title']}")
+            lines.append(f"Resumo: {story['summary']}\n")
+            lines.append("Personagens:")
             for char in story.get('characters', []):
-                print(f"- {char['name']}: {char['description']}")
+                lines.append(f"- {char['name']}: {char['description']}")
                 if 'role' in char:
-                    print(f"  Papel: {char['role']}")
-            print("\nLocais:")
+                    lines.append(f"  Papel: {char['role']}")
+            lines.append("\nLocais:")
             for loc in story.get('locations', []):
-                print(f"- {loc['name']}: {loc['description']}")
-            print("-" * 50)
+                lines.append(f"- {loc['name']}: {loc['description']}")
+            lines.append("-" * 50)
+        print("\n".join(lines))
         
         while True:
             try:
-                choice = int(input(f"\nEscolha uma história (1-{len(stories)}): "))
+                choice = int(await ainput(f"\nEscolha uma história (1-{len(stories)}): "))
                 if 1 <= choice <= len(stories):
                     selected_story = stories[choice - 1]
-                    self.log_manager.debug("story_manager", f"História selecionada: {selected_story['title']}")
+                    self.log_manager.debug("story_manager", "História selecionada: %s", selected_story['title'])
                     return selected_story
                 print(f"Por favor, escolha um número entre 1 e {len(stories)}")
             except ValueError:
@@ -368,7 +375,7 @@ class StoryManager:
                 char_data['id'] = character['id']
                 characters.append(character)
             except Exception as e:
-                self.log_manager.error("story_manager", f"Erro ao criar personagem {char_data.get('name')}: {e}")
+                self.log_manager.error("story_manager", "Erro ao criar personagem %s: %s", char_data.get('name'), e)
                 
         return characters
 
@@ -389,20 +396,23 @@ class StoryManager:
                 datetime.now().isoformat()
             )
             
-            story_id = await self.db.execute_write(query, params)
+            # Todas as escritas da história são confirmadas num único commit
+            story_id = await self.db.execute_write(query, params, commit=False)
             
             # Salva os personagens da história
             for character in story_context.get('characters', []):
                 try:
                     await self._save_story_character(story_id, character)
                 except Exception as e:
-                    self.log_manager.error("story_manager", f"Erro ao salvar personagem: {e}")
+                    self.log_manager.error("story_manager", "Erro ao salvar personagem: %s", e)
                     raise
             
             # Salva os locais da história
             for location in story_context.get('locations', []):
                 await self._save_story_location(story_id, location)
             
+            await self.db.commit()
+            
             story_context['id'] = story_id
             self.current_story = story_context
             self.active_story_id = story_id
@@ -410,7 +420,8 @@ class StoryManager:
             return story_context
             
         except Exception as e:
-            self.log_manager.error("story_manager", f"Erro ao salvar história: {e}")
+            await self.db.rollback()
+            self.log_manager.error("story_manager", "Erro ao salvar história: %s", e)
             raise
 
     async def _save_story_character(self, story_id: int, character: Dict[str, Any]) -> None:
@@ -429,7 +440,8 @@ class StoryManager:
                 relationships
             ) VALUES (?, ?, ?, ?)
             """,
-            (story_id, character['id'], character.get('role'), json.dumps({}))
+            (story_id, character['id'], character.get('role'), json.dumps({})),
+            commit=False
         )
 
     async def _save_story_location(self, story_id: int, location: Dict[str, Any]) -> None:
@@ -446,7 +458,7 @@ class StoryManager:
             location['description']
         )
         
-        location_id = await self.db.execute_write(query, params)
+        location_id = await self.db.execute_write(query, params, commit=False)
         
         # Agora associa o local à história com o ID correto
         await self.db.execute_write(
@@ -457,7 +469,8 @@ class StoryManager:
                 description
             ) VALUES (?, ?, ?)
             """,
-            (story_id, location_id, location.get('description'))
+            (story_id, location_id, location.get('description')),
+            commit=False
         )
 
     async def get_current_story(self) -> Optional[Dict[str, Any]]:
@@ -471,9 +484,9 @@ class StoryManager:
                     if result:
                         self.current_story = result[0]
                         self.active_story_id = result[0]['id']
-                        self.log_manager.debug("story_manager", f"História carregada do banco: {self.current_story.get('title')}")
+                        self.log_manager.debug("story_manager", "História carregada do banco: %s", self.current_story.get('title'))
             except Exception as e:
-                self.log_manager.error("story_manager", f"Erro ao carregar história do banco de dados: {e}")
+                self.log_manager.error("story_manager", "Erro ao carregar história do banco de dados: %s", e)
         
         return self.current_story
 
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+import console
+
+@pytest.fixture
+def stdin_pipe(monkeypatch):
+    read_fd, write_fd = os.pipe()
+    stdin = open(read_fd, "r", encoding="utf-8")
+    monkeypatch.setattr(sys, "stdin", stdin)
+    monkeypatch.setattr(console, "_pending", bytearray())
+    with open(write_fd, "wb", buffering=0) as writer:
+        yield writer
+    stdin.close()
+
+@pytest.mark.asyncio
+async def test_ainput_reads_lines_from_a_pipe(stdin_pipe):
+    stdin_pipe.write("1\nsegunda opção\r\nfim".encode("utf-8"))
+    stdin_pipe.close()
+
+    assert await console.ainput() == "1"
+    assert await console.ainput() == "segunda opção"
+    assert await console.ainput() == "fim"
+    with pytest.raises(EOFError):
+        await console.ainput()
+
+@pytest.mark.asyncio
+async def test_ainput_does_not_lose_input_after_a_timeout(stdin_pipe):
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(console.ainput(), 0.05)
+
+    stdin_pipe.write(b"2\n")
+    assert await asyncio.wait_for(console.ainput(), 5) == "2"
+
+def test_pending_read_does_not_abort_interpreter_shutdown():
+    # Com a leitura pendente numa thread presa no sys.stdin, o interpretador
+    # abortava ao encerrar com "could not acquire lock for <stdin>"
+    code = (
+        "import asyncio, console\n"
+        "try:\n"
+        "    asyncio.run(asyncio.wait_for(console.ainput(), 0.1))\n"
+        "except asyncio.TimeoutError:\n"
+        "    print('timeout')\n"
+    )
+    read_fd, write_fd = os.pipe()
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            stdin=read_fd,
+            capture_output=True,
+            cwd=Path(__file__).resolve().parent.parent,
+            timeout=30
+        )
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+    assert result.returncode == 0, result.stderr.decode()
+    assert result.stdout.decode().strip() == "timeout"
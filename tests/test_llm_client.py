@@ -0,0 +1,166 @@
+import asyncio
+import aiohttp
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from llm_client import LLMClient, LLMResponse, PermanentLLMError, _acquire_session, _release_session
+
+STORY_JSON = (
+    '{"title": "Test Story", "summary": "Test summary", '
+    '"characters": [{"name": "Ana", "description": "Uma exploradora curiosa"}], '
+    '"locations": [{"name": "Porto", "description": "Um porto antigo"}]}'
+)
+
+@pytest.fixture
+def client():
+    client = LLMClient({"base_url": "http://localhost:1234/v1/"}, log_manager=MagicMock())
+    client.generate = AsyncMock()
+    return client
+
+@pytest.mark.asyncio
+async def test_generate_story_ignores_text_around_json(client):
+    client.generate.return_value = LLMResponse(
+        content=f"Aqui está a história: {STORY_JSON} Espero que goste {{:}}"
+    )
+
+    story = await client.generate_story("prompt")
+    assert story["title"] == "Test Story"
+    assert story["format"] == "json"
+
+@pytest.mark.asyncio
+async def test_generate_story_repairs_python_style_json(client):
+    content = STORY_JSON.replace('"', "'")[:-1] + ", 'draft': False, 'sequel': None}"
+    client.generate.return_value = LLMResponse(content=content)
+
+    story = await client.generate_story("prompt")
+    assert story["summary"] == "Test summary"
+    assert story["characters"][0]["name"] == "Ana"
+
+class FakeStream:
+    def __init__(self, lines):
+        self.lines = iter(lines)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.lines)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class FakeResponse:
+    def __init__(self, status, body, lines=()):
+        self.status = status
+        self.body = body
+        self.content = FakeStream(lines)
+
+    async def text(self):
+        return self.body
+
+    async def read(self):
+        return self.body.encode()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+@pytest.fixture
+def http_client():
+    client = LLMClient({"base_url": "http://localhost:1234/v1/", "retry_delay": 0}, log_manager=MagicMock())
+    client._session = MagicMock()
+    return client
+
+@pytest.mark.asyncio
+async def test_request_does_not_retry_permanent_errors(http_client):
+    http_client._session.post.return_value = FakeResponse(401, "unauthorized")
+
+    with pytest.raises(PermanentLLMError):
+        await http_client._make_request_with_retry("url", {}, {})
+    assert http_client._session.post.call_count == 1
+
+@pytest.mark.asyncio
+async def test_request_retries_transient_errors(http_client):
+    http_client._session.post.side_effect = [
+        FakeResponse(429, "slow down"),
+        FakeResponse(200, '{"ok": true}'),
+    ]
+
+    assert await http_client._make_request_with_retry("url", {}, {}) == {"ok": True}
+    assert http_client._session.post.call_count == 2
+
+@pytest.mark.asyncio
+async def test_generate_stream_yields_sse_deltas(http_client):
+    http_client._session.post.side_effect = [
+        FakeResponse(503, "loading"),
+        FakeResponse(200, "", lines=[
+            b'data: {"choices": [{"delta": {"role": "assistant"}}]}\n',
+            b"\n",
+            b'data: {"choices": [{"delta": {"content": "Era"}}]}\n',
+            b"\n",
+            b'data: {"choices": [{"delta": {"content": " uma"}}\n',
+            b"data: ]}\n",
+            b"\n",
+            b'data: {"choices": [{"delta":\n',
+            b'data: {"content": " vez"}}]}\n',
+            b"\n",
+            b'data: {"choices": [], "usage": {"total_tokens": 12}}\n',
+            b"\n",
+            b"data: [DONE]\n",
+            b"\n",
+        ]),
+    ]
+
+    chunks = [chunk async for chunk in http_client.generate_stream("prompt")]
+    assert chunks == ["Era", " uma", " vez"]
+    assert http_client._session.post.call_count == 2
+
+@pytest.mark.asyncio
+async def test_generate_stream_batches_deltas(http_client):
+    lines = []
+    for word in ("a", "b", "c"):
+        lines.append(f'data: {{"choices": [{{"delta": {{"content": "{word}"}}}}]}}\n'.encode())
+        lines.append(b"\n")
+    http_client._session.post.return_value = FakeResponse(200, "", lines=lines)
+
+    chunks = [chunk async for chunk in http_client.generate_stream("prompt", batch_size=2)]
+    assert chunks == ["ab", "c"]
+
+@pytest.mark.asyncio
+async def test_generate_stream_raises_server_error_events(http_client):
+    http_client._session.post.return_value = FakeResponse(200, "", lines=[
+        b'data: {"choices": [{"delta": {"content": "Era"}}]}\n',
+        b"\n",
+        b'data: {"error": {"message": "model unloaded"}}\n',
+        b"\n",
+    ])
+
+    chunks = []
+    with pytest.raises(Exception, match="model unloaded"):
+        async for chunk in http_client.generate_stream("prompt"):
+            chunks.append(chunk)
+    assert chunks == ["Era"]
+    assert http_client._session.post.call_count == 1
+
+def test_shared_session_is_recreated_for_a_new_event_loop():
+    timeout = aiohttp.ClientTimeout(total=1)
+
+    async def acquire_and_release():
+        session = await _acquire_session(timeout, 30)
+        await _release_session(session)
+        return session
+
+    async def acquire_and_leak():
+        return await _acquire_session(timeout, 30)
+
+    old_loop = asyncio.new_event_loop()
+    try:
+        leaked = old_loop.run_until_complete(acquire_and_leak())
+        fresh = asyncio.run(acquire_and_release())
+        assert fresh is not leaked
+        assert fresh.closed
+        assert not leaked.closed
+    finally:
+        old_loop.run_until_complete(leaked.close())
+        old_loop.close()
@@ -0,0 +1,85 @@
+import logging
+import pytest
+from config import ConfigManager
+from log_manager import LogManager, _BatchFileHandler, _BatchMemoryHandler, _CachedTimeFormatter
+
+@pytest.fixture
+def config(tmp_path):
+    config = ConfigManager(tmp_path / "config.json")
+    config.set("log_file", str(tmp_path / "taleweaver.log"))
+    return config
+
+@pytest.fixture
+def log_manager(config):
+    log_manager = LogManager(config)
+    yield log_manager
+    # Os loggers são globais; não deixa módulos desativados para outros testes
+    for logger in log_manager.loggers.values():
+        logger.disabled = False
+    LogManager.close()
+
+@pytest.fixture
+def file_handler(tmp_path):
+    handler = _BatchFileHandler(tmp_path / "taleweaver.log", encoding="utf-8", delay=True)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    yield handler
+    handler.close()
+
+def make_record(message, level=logging.INFO):
+    return logging.LogRecord("story_manager", level, __file__, 0, message, None, None)
+
+def test_memory_handler_flushes_the_file_once_per_batch(file_handler, monkeypatch):
+    flushes = []
+    flush = file_handler.flush
+    monkeypatch.setattr(file_handler, "flush", lambda: (flushes.append(1), flush()))
+    memory_handler = _BatchMemoryHandler(capacity=1000, flushLevel=logging.ERROR, target=file_handler)
+
+    for i in range(100):
+        memory_handler.handle(make_record(f"linha {i}"))
+    assert flushes == []
+
+    memory_handler.flush()
+    assert len(flushes) == 1
+    with open(file_handler.baseFilename, encoding="utf-8") as f:
+        assert f.read().splitlines() == [f"linha {i}" for i in range(100)]
+
+    # Sem registros pendentes não há nada para gravar
+    memory_handler.flush()
+    assert len(flushes) == 1
+
+def test_memory_handler_writes_errors_immediately(file_handler):
+    memory_handler = _BatchMemoryHandler(capacity=1000, flushLevel=logging.ERROR, target=file_handler)
+
+    memory_handler.handle(make_record("antes do erro"))
+    memory_handler.handle(make_record("falhou", logging.ERROR))
+
+    with open(file_handler.baseFilename, encoding="utf-8") as f:
+        assert f.read().splitlines() == ["antes do erro", "falhou"]
+
+def test_get_logger_disables_modules_turned_off_in_config(config, log_manager):
+    config.set_module_logging("story", False)
+
+    assert log_manager.get_logger("story_manager").disabled is True
+    assert log_manager.get_logger("llm_client").disabled is False
+    assert log_manager.get_logger("main").disabled is False
+
+def test_refresh_applies_module_logging_changes(config, log_manager):
+    config.on_module_logging_change(log_manager.refresh)
+    logger = log_manager.get_logger("llm_client")
+    assert logger.disabled is False
+
+    config.set_module_logging("llm", False)
+    assert logger.disabled is True
+
+    config.set_module_logging("llm", True)
+    assert logger.disabled is False
+
+def test_cached_time_formatter_matches_the_standard_timestamp():
+    formatter = _CachedTimeFormatter("%(asctime)s")
+    reference = logging.Formatter("%(asctime)s")
+
+    for created in (1700000000.25, 1700000000.75, 1700000001.5, 1700000000.5):
+        record = make_record("linha")
+        record.created = created
+        record.msecs = (created - int(created)) * 1000
+        assert formatter.format(record) == reference.format(record)
@@ -29,9 +29,8 @@ class VoiceSystem:
         self.volume = volume
         self.voice_profiles: Dict[str, Any] = {}
         
-        # Verifica se o diretório de vozes existe
-        if not self.voice_dir.exists():
-            self.voice_dir.mkdir(parents=True)
+        # Garante que o diretório de vozes existe (uma única chamada ao SO)
+        self.voice_dir.mkdir(parents=True, exist_ok=True)
             
         # Configurações padrão do dispositivo de áudio
         sd.default.samplerate = self.sample_rate
@@ -45,23 +44,18 @@ class VoiceSystem:
             profile_name: Nome do perfil (ex: 'narrator')
             voice_file: Nome do arquivo de voz no diretório de vozes
         """
-        try:
-            voice_path = self.voice_dir / voice_file
-            if not voice_path.exists():
-                raise FileNotFoundError(f"Arquivo de voz não encontrado: {voice_path}")
-                
-            self.voice_profiles[profile_name] = {
-                'file': voice_path,
-                'config': {
-                    'pitch': 0.0,
-                    'speed': 1.0,
-                    'emphasis': 1.0
-                }
-            }
+        voice_path = self.voice_dir / voice_file
+        if not voice_path.exists():
+            raise FileNotFoundError(f"Arquivo de voz não encontrado: {voice_path}")
             
-        except Exception as e:
-            print(f"Erro ao adicionar perfil de voz: {e}")
-            raise
+        self.voice_profiles[profile_name] = {
+            'file': voice_path,
+            'config': {
+                'pitch': 0.0,
+                'speed': 1.0,
+                'emphasis': 1.0
+            }
+        }
 
     async def text_to_speech(self, text: str, voice_profile: str = 'default') -> np.ndarray:
         """
@@ -74,20 +68,15 @@ class VoiceSystem:
         Returns:
             Array numpy contendo os dados de áudio
         """
-        try:
-            # Verifica se o perfil de voz existe
-            if voice_profile not in self.voice_profiles:
-                raise ValueError(f"Perfil de voz '{voice_profile}' não encontrado")
-                
-            # TODO: Implementar conversão de texto para fala
-            # Por enquanto, retornamos um array de silêncio
-            duration = len(text) * 0.1  # 100ms por caractere
-            samples = int(duration * self.sample_rate)
-            return np.zeros(samples, dtype=np.float32)
+        # Verifica se o perfil de voz existe
+        if voice_profile not in self.voice_profiles:
+            raise ValueError(f"Perfil de voz '{voice_profile}' não encontrado")
             
-        except Exception as e:
-            print(f"Erro ao converter texto em fala: {e}")
-            raise
+        # TODO: Implementar conversão de texto para fala
+        # Por enquanto, retornamos um array de silêncio
+        duration = len(text) * 0.1  # 100ms por caractere
+        samples = int(duration * self.sample_rate)
+        return np.zeros(samples, dtype=np.float32)
 
     async def play_audio(self, audio_data: np.ndarray) -> None:
         """
@@ -96,25 +85,17 @@ class VoiceSystem:
         Args:
             audio_data: Array numpy contendo os dados de áudio
         """
-        try:
-            # Aplica volume
-            audio_data = audio_data * self.volume
-            
-            # Reproduz o áudio
-            sd.play(audio_data)
-            sd.wait()
-            
-        except Exception as e:
-            print(f"Erro ao reproduzir áudio: {e}")
-            raise
+        # Aplica volume
+        audio_data = audio_data * self.volume
+        
+        # Reproduz o áudio; a espera pelo fim da reprodução roda numa thread
+        # para não bloquear o loop de eventos
+        sd.play(audio_data)
+        await asyncio.get_running_loop().run_in_executor(None, sd.wait)
 
     async def stop_audio(self) -> None:
         """Interrompe a reprodução de áudio atual"""
-        try:
-            sd.stop()
-        except Exception as e:
-            print(f"Erro ao parar reprodução de áudio: {e}")
-            raise
+        sd.stop()
 
     async def set_volume(self, volume: float) -> None:
         """
@@ -123,22 +104,14 @@ class VoiceSystem:
         Args:
             volume: Novo volume (0.0 a 1.0)
         """
-        try:
-            if not 0.0 <= volume <= 1.0:
-                raise ValueError("Volume deve estar entre 0.0 e 1.0")
-                
-            self.volume = volume
-        except Exception as e:
-            print(f"Erro ao definir volume: {e}")
-            raise
+        if not 0.0 <= volume <= 1.0:
+            raise ValueError("Volume deve estar entre 0.0 e 1.0")
+            
+        self.volume = volume
 
     async def close(self) -> None:
         """Libera recursos do sistema de voz"""
-        try:
-            await self.stop_audio()
-        except Exception as e:
-            print(f"Erro ao fechar sistema de voz: {e}")
-            raise
+        await self.stop_audio()
 
     async def set_narrator_voice(self, voice_file: str) -> None:
         """
@@ -147,18 +120,13 @@ class VoiceSystem:
         Args:
             voice_file: Caminho do arquivo de voz do narrador
         """
-        try:
-            # Armazena a configuração da voz do narrador
-            self.voice_profiles['narrator'] = {
-                'file': self.voice_dir / voice_file,
-                'config': {
-                    'pitch': 0.0,
-                    'speed': 1.0,
-                    'emphasis': 1.0
-                }
+        # Armazena a configuração da voz do narrador
+        self.voice_profiles['narrator'] = {
+            'file': self.voice_dir / voice_file,
+            'config': {
+                'pitch': 0.0,
+                'speed': 1.0,
+                'emphasis': 1.0
             }
-            print(f"Voz do narrador configurada: {voice_file}")
-            
-        except Exception as e:
-            print(f"Erro ao configurar voz do narrador: {e}")
-            raise
+        }
+        print(f"Voz do narrador configurada: {voice_file}")